@@ -1,8 +1,11 @@
+from collections import defaultdict
 from dataclasses import dataclass
-from functools import cached_property
-from typing import List, FrozenSet, Dict, Set, Tuple
+from functools import cached_property, lru_cache
+from typing import List, FrozenSet, Dict, Set, Tuple, Optional, Sequence
 import csv
+import hashlib
 import logging
+import os
 import numpy as np
 
 
@@ -24,6 +27,47 @@ class HistoryEntry:
         return len(self.communities)
 
 
+class UnionFind:
+    """Disjoint-set forest over a fixed collection of elements, with path compression and union by rank.
+
+    Attributes:
+        parent (Dict): Maps each element to its parent in the forest (roots map to themselves).
+        rank (Dict): An upper bound on the height of the tree rooted at each element.
+    """
+
+    def __init__(self, elements):
+        self.parent = {element: element for element in elements}
+        self.rank = {element: 0 for element in self.parent}
+
+    def find(self, element):
+        """Returns the representative of the set containing `element`, compressing the path to it."""
+        root = element
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[element] != root:
+            self.parent[element], element = root, self.parent[element]
+        return root
+
+    def union(self, first, second) -> bool:
+        """Merges the sets containing `first` and `second`, returning whether they were separate."""
+        first_root, second_root = self.find(first), self.find(second)
+        if first_root == second_root:
+            return False
+        if self.rank[first_root] < self.rank[second_root]:
+            first_root, second_root = second_root, first_root
+        self.parent[second_root] = first_root
+        if self.rank[first_root] == self.rank[second_root]:
+            self.rank[first_root] += 1
+        return True
+
+    def groups(self) -> List[FrozenSet]:
+        """Returns the current sets, ordered by the first appearance of their elements."""
+        members = {}
+        for element in self.parent:
+            members.setdefault(self.find(element), []).append(element)
+        return [frozenset(group) for group in members.values()]
+
+
 def read_cognate_file(
     input_file: str,
     dialect_name: str,
@@ -48,7 +92,7 @@ def read_cognate_file(
     @param cognateset_col_name: The name of the column containing cognateset identifiers.
     @return: A dictionary where keys are tuples of (language, concept) and values are sets of cognatesets.
     """
-    cognates_dict = {}
+    cognates_dict: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
     cognateset_string_to_id_map: Dict[Tuple[str, str], int] = {}
     next_cognateset_id: int = 1
 
@@ -93,34 +137,48 @@ def read_cognate_file(
                     )
                 actual_dialect_for_reader = dialect_name
 
-            reader = csv.DictReader(f_in, dialect=actual_dialect_for_reader)
+            # A plain reader with column indices avoids building a dict for every row
+            reader = csv.reader(f_in, dialect=actual_dialect_for_reader)
+            fieldnames = next(reader, None)
 
-            if reader.fieldnames is None:
+            if fieldnames is None:
                 raise ValueError(
                     f"Could not read header from CSV file '{input_file}'. The file might be empty or improperly formatted."
                 )
 
             # Check for required column headers (case-sensitive)
             missing_columns = [
-                col for col in required_columns if col not in reader.fieldnames
+                col for col in required_columns if col not in fieldnames
             ]
             if missing_columns:
                 raise ValueError(
                     f"Missing required columns in '{input_file}': {missing_columns}. "
                     f"Please check column names or use command-line options to specify them. "
-                    f"Found columns: {reader.fieldnames}"
+                    f"Found columns: {fieldnames}"
                 )
 
-            for row_number, row_dict in enumerate(reader, start=2):
-                lang = row_dict.get(lang_col_name)
-                concept = row_dict.get(concept_col_name)
-                cognateset_str = row_dict.get(cognateset_col_name)
+            lang_idx, concept_idx, cognateset_idx = (
+                fieldnames.index(col) for col in required_columns
+            )
+            min_row_length = max(lang_idx, concept_idx, cognateset_idx) + 1
+
+            for row_number, row in enumerate(reader, start=2):
+                if not row:  # Blank lines are skipped silently
+                    continue
+
+                if len(row) >= min_row_length:
+                    lang = row[lang_idx]
+                    concept = row[concept_idx]
+                    cognateset_str = row[cognateset_idx]
+                else:
+                    lang = concept = cognateset_str = None
 
                 # Check for empty values in required columns (including cognateset_str)
                 if not lang or not concept or not cognateset_str:
                     logging.warning(  # Replace print with logging
                         f"Line {row_number} in '{input_file}': Skipping row due to missing value(s) "
-                        f"for columns '{lang_col_name}', '{concept_col_name}', or '{cognateset_col_name}'. Data: {row_dict}"
+                        f"for columns '{lang_col_name}', '{concept_col_name}', or '{cognateset_col_name}'. "
+                        f"Data: {dict(zip(fieldnames, row))}"
                     )
                     continue
 
@@ -129,16 +187,13 @@ def read_cognate_file(
                     concept,
                     cognateset_str,
                 )  # concept is definitely not None here
-                if cognateset_map_key not in cognateset_string_to_id_map:
-                    cognateset_string_to_id_map[cognateset_map_key] = next_cognateset_id
+                cognateset_val = cognateset_string_to_id_map.get(cognateset_map_key)
+                if cognateset_val is None:
+                    cognateset_val = next_cognateset_id
+                    cognateset_string_to_id_map[cognateset_map_key] = cognateset_val
                     next_cognateset_id += 1
 
-                cognateset_val = cognateset_string_to_id_map[cognateset_map_key]
-
-                key = (lang, concept)
-                if key not in cognates_dict:
-                    cognates_dict[key] = set()
-                cognates_dict[key].add(cognateset_val)
+                cognates_dict[(lang, concept)].add(cognateset_val)
 
     except FileNotFoundError:
         raise FileNotFoundError(f"The file {input_file} does not exist.")
@@ -149,9 +204,31 @@ def read_cognate_file(
     except csv.Error as e:
         raise ValueError(f"CSV processing error in file '{input_file}': {e}") from e
 
+    # Behave like a plain dictionary from here on, so lookups of missing pairs raise KeyError
+    cognates_dict.default_factory = None
+
     return cognates_dict
 
 
+def extract_languages_and_concepts(
+    cognates: Dict[Tuple[str, str], Set[int]]
+) -> Tuple[List[str], List[str]]:
+    """
+    Collects the sorted languages and concepts of a cognate dataset in a single pass over its keys.
+
+    @param cognates: A dictionary where keys are tuples of (language, concept), as returned by
+                     `read_cognate_file()`.
+    @return: A tuple with the sorted list of languages and the sorted list of concepts.
+    """
+    languages = set()
+    concepts = set()
+    for lang, concept in cognates:
+        languages.add(lang)
+        concepts.add(concept)
+
+    return sorted(languages), sorted(concepts)
+
+
 def compute_distance_matrix(
     cognates: Dict[Tuple[str, str], Set[int]],
     synonyms: str = "average",
@@ -197,100 +274,153 @@ def compute_distance_matrix(
     """
 
     # Extract unique languages and concepts
-    languages = sorted({lang for lang, _ in cognates.keys()})
-    concepts = sorted({concept for _, concept in cognates.keys()})
-
-    # Initialize the distance matrix
-    dist_matrix = np.zeros((len(languages), len(languages)))
-
-    # Helper function to calculate distance between sets of cognates
-    def _calculate_distance(set1: Set[int], set2: Set[int]) -> float:
-        """
-        Calculates the Jaccard distance between two sets of cognate IDs.
-        Jaccard Distance = 1 - (Intersection / Union).
-
-        When used by synonym strategies, this function is typically called with
-        singleton sets (e.g., _calculate_distance({c1}, {c2})). In this case:
-        - Returns 0 if c1 == c2 (identical cognate IDs).
-        - Returns 1 if c1 != c2 (different cognate IDs).
-
-        The condition `if not set1 or not set2: return 0` means that if
-        either set is empty, the distance is 0. Standard Jaccard distance
-        between an empty set and a non-empty set is 1, and between two
-        empty sets is often 0 (or undefined). However, in the current
-        `compute_distance_matrix` logic, this specific line is not hit
-        when one set is empty and the other is not during synonym comparison,
-        as the list comprehension for `all_dists` (or `min_dist`/`max_dist`)
-        would be empty, leading to a default distance of 1 for the concept.
-        It would apply if, for example, `cognates.get()` returned `None`
-        instead of `set()`, and this function was called directly with it.
-        """
-        if not set1 or not set2:  # Handles two empty sets, or one empty and one not.
-            # If both are empty, union is 0, intersection is 0.
-            # If one is empty, union is len(other_set), intersection is 0.
-            # This specific return 0 deviates from standard Jaccard for one empty set.
-            # However, as noted above, the calling context in compute_distance_matrix
-            # handles the one-empty-set case differently before this would apply.
-            return 0
-        intersection = set1.intersection(set2)
-        union = set1.union(set2)
-        return 1 - len(intersection) / len(union)
-
-    # Compute pairwise distances
-    for i, lang1 in enumerate(languages):
-        for j, lang2 in enumerate(languages):
-            if j <= i:
-                continue  # This matrix is symmetric, so skip redundant calculations
-
-            distances = []
-            for concept in concepts:
-                cognates1 = cognates.get((lang1, concept), set())
-                cognates2 = cognates.get((lang2, concept), set())
-
-                if not cognates1 and not cognates2:
-                    if missing_data == "max_dist":
-                        distances.append(1)
-                    elif missing_data == "zero":
-                        distances.append(0)
-                else:
-                    if synonyms == "min":
-                        min_dist = min(
-                            [
-                                _calculate_distance({c1}, {c2})
-                                for c1 in cognates1
-                                for c2 in cognates2
-                            ],
-                            default=1,
-                        )
-                        distances.append(min_dist)
-                    elif synonyms == "max":
-                        max_dist = max(
-                            [
-                                _calculate_distance({c1}, {c2})
-                                for c1 in cognates1
-                                for c2 in cognates2
-                            ],
-                            default=1,
-                        )
-                        distances.append(max_dist)
-                    elif synonyms == "average":
-                        all_dists = [
-                            _calculate_distance({c1}, {c2})
-                            for c1 in cognates1
-                            for c2 in cognates2
-                        ]
-                        if all_dists:
-                            avg_dist = sum(all_dists) / len(all_dists)
-                        else:
-                            avg_dist = 1
-                        distances.append(avg_dist)
-
-            # Compute and assign the average distance for this language pair
-            if distances:
-                dist = sum(distances) / len(distances)
+    languages, concepts = extract_languages_and_concepts(cognates)
+    num_languages = len(languages)
+    language_index = {lang: idx for idx, lang in enumerate(languages)}
+    concept_index = {concept: idx for idx, concept in enumerate(concepts)}
+
+    # Collect the (language index, cognateset) entries of each concept
+    concept_entries = [([], []) for _ in concepts]
+    for (lang, concept), cognatesets in cognates.items():
+        rows, columns = concept_entries[concept_index[concept]]
+        for cognateset in cognatesets:
+            rows.append(language_index[lang])
+            columns.append(cognateset)
+
+    # Sum of the per-concept distances and number of contributing concepts, for every pair of
+    # languages; concepts are processed in sorted order, as the distances are averaged over them
+    distance_sums = np.zeros((num_languages, num_languages))
+    num_distances = np.zeros((num_languages, num_languages))
+
+    for rows, columns in concept_entries:
+        # Indicator matrix of languages by the cognatesets of this concept. Each cognate of one
+        # language is compared with each cognate of the other (distance 0 if identical, 1
+        # otherwise), so the strategies reduce to the numbers of cognates and shared cognates.
+        _, local_columns = np.unique(columns, return_inverse=True)
+        indicator = np.zeros((num_languages, len(set(columns))))
+        indicator[rows, local_columns] = 1.0
+        num_cognates = indicator.sum(axis=1)
+        num_shared = indicator @ indicator.T
+        num_pairs = np.outer(num_cognates, num_cognates)
+
+        present = num_cognates > 0
+        both_present = np.logical_and.outer(present, present)
+        none_present = np.logical_and.outer(~present, ~present)
+        one_present = ~(both_present | none_present)
+
+        if synonyms in ("min", "max", "average"):
+            if synonyms == "min":
+                # 0 if any cognate is shared
+                concept_distances = np.where(num_shared > 0, 0.0, 1.0)
+            elif synonyms == "max":
+                # 0 only if both languages have the same single cognate
+                concept_distances = np.where(num_shared == num_pairs, 0.0, 1.0)
             else:
-                dist = 1
-            dist_matrix[i, j] = dist_matrix[j, i] = dist
+                # The fraction of pairs of cognates that differ
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    concept_distances = (num_pairs - num_shared) / num_pairs
+            distance_sums[both_present] += concept_distances[both_present]
+            num_distances[both_present] += 1
+
+            # Only one of the languages has cognates, so no pair of cognates can match
+            distance_sums[one_present] += 1
+            num_distances[one_present] += 1
+
+        if missing_data == "max_dist":
+            distance_sums[none_present] += 1
+            num_distances[none_present] += 1
+        elif missing_data == "zero":
+            num_distances[none_present] += 1
+
+    # Average the distances over the contributing concepts (1 if there are none); the matrix is
+    # symmetric, with zeros on the diagonal
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dist_matrix = np.where(num_distances > 0, distance_sums / num_distances, 1.0)
+    np.fill_diagonal(dist_matrix, 0.0)
+
+    return dist_matrix
+
+
+@lru_cache(maxsize=None)
+def source_digest(*paths: str) -> str:
+    """
+    Computes a BLAKE2b digest of source files (read once per process).
+
+    Cache keys include it, so that results cached on disk are not reused once the code that
+    produced them has changed.
+
+    @param paths: The paths to the source files.
+    @return: The hexadecimal digest.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        with open(path, "rb") as f_in:
+            hasher.update(f_in.read())
+    return hasher.hexdigest()
+
+
+def _file_digest(path: str, extra: Sequence = ()) -> str:
+    """
+    Computes a BLAKE2b digest of a file's contents, optionally combined with extra values.
+
+    @param path: The path to the file to hash.
+    @param extra: Additional values (e.g. options used to process the file) to include in the digest.
+    @return: The hexadecimal digest.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f_in:
+        for chunk in iter(lambda: f_in.read(1 << 20), b""):
+            hasher.update(chunk)
+    hasher.update(repr(tuple(extra)).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def get_distance_matrix(
+    cognates: Dict[Tuple[str, str], Set[int]],
+    source: str,
+    cache_dir: Optional[str] = None,
+    synonyms: str = "average",
+    missing_data: str = "max_dist",
+    read_options: Sequence = (),
+) -> np.ndarray:
+    """
+    Returns the distance matrix for a cognate dataset, reusing a copy cached on disk if available.
+
+    The cache key combines a digest of the source file with the options used to read it and
+    to compute the distances, and with a digest of this module, so a cached matrix is only
+    reused for identical inputs and an unchanged distance computation.
+
+    @param cognates: The cognate data read from `source`, as returned by `read_cognate_file()`.
+    @param source: The path to the cognate file the data was read from.
+    @param cache_dir: The directory holding cached matrices. If None, caching is disabled.
+    @param synonyms: The synonym strategy, as in `compute_distance_matrix()`.
+    @param missing_data: The missing data strategy, as in `compute_distance_matrix()`.
+    @param read_options: The options used to read `source` (dialect, encoding, column names).
+    @return: A symmetric matrix of distances between each pair of languages.
+    """
+    if cache_dir is None:
+        return compute_distance_matrix(
+            cognates, synonyms=synonyms, missing_data=missing_data
+        )
+
+    digest = _file_digest(
+        source, (*read_options, synonyms, missing_data, source_digest(__file__))
+    )
+    cache_file = os.path.join(cache_dir, f"dist_{digest}.npy")
+    if os.path.exists(cache_file):
+        logging.info(f"Loading cached distance matrix from '{cache_file}'.")
+        return np.load(cache_file)
+
+    dist_matrix = compute_distance_matrix(
+        cognates, synonyms=synonyms, missing_data=missing_data
+    )
+
+    # Write to a temporary file first, so concurrent runs never read a partial matrix
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as f_out:
+        np.save(f_out, dist_matrix)
+    os.replace(tmp_file, cache_file)
 
     return dist_matrix
 
@@ -338,19 +468,23 @@ def decompose_sets(list1: List[set], list2: List[set]) -> List[set]:
      Element 40 is discarded.)
     """
 
-    # Initialize the result
-    result = []
+    # Label each element with the index of the set(s) of list1 containing it, so that each set of
+    # list2 is split in a single pass over its elements instead of being intersected with every
+    # set of list1. Sets in list1 are usually disjoint (a partition), giving one label per element.
+    labels = {}
+    for index, set1 in enumerate(list1):
+        for element in set1:
+            labels.setdefault(element, []).append(index)
 
-    # Iterate over each set in list2 and split it into subsets that match the sets in list1
+    result = []
     for set2 in list2:
-        sub_result = []
-        for set1 in list1:
-            intersection = set2 & set1
-            if intersection:
-                sub_result.append(intersection)
-        result.append(sub_result)
-
-    # Flatten the result before returning
-    result = [item for sublist in result for item in sublist]
+        buckets = {}
+        for element in set2:
+            for index in labels.get(element, ()):
+                buckets.setdefault(index, []).append(element)
+
+        # Subsets follow the order of list1 and keep the type of the set they come from
+        set_type = frozenset if isinstance(set2, frozenset) else set
+        result.extend(set_type(buckets[index]) for index in sorted(buckets))
 
     return result
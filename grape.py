@@ -1,11 +1,17 @@
 #!/usr/bin/env python
 
 # Import libraries
-from collections import defaultdict
-from typing import Dict, List, Set, Tuple, Union, FrozenSet
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Set, Tuple, Union, FrozenSet
 import argparse
 import csv
+import hashlib
+import importlib
 import logging
+import os
+import pickle
+import random
 import networkx as nx
 import numpy as np
 from ete3 import Tree, TreeNode
@@ -20,17 +26,37 @@ logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
 
 class CommunityMethod:
+    # Whether detection draws random numbers, and so is only reproducible with a seed
+    randomized = True
+
     def __init__(self, graph: nx.Graph, weight: str, seed: int = None):
         self.graph = graph
         self.weight = weight
         self.seed = seed
+        self._cache: Dict[float, List[FrozenSet]] = {}
 
     def find_communities(self, resolution: Union[float, int]) -> List[FrozenSet]:
+        # Results are memoized by resolution, as searches may probe the same value more than once;
+        # this is only done when detection is deterministic (not randomized, or seeded), so that
+        # unseeded randomized runs still get a new draw for every probe
+        if self.randomized and self.seed is None:
+            return self.detect_communities(resolution)
+
+        key = round(float(resolution), 12)
+        communities = self._cache.get(key)
+        if communities is None:
+            communities = self.detect_communities(resolution)
+            self._cache[key] = communities
+        return list(communities)
+
+    def detect_communities(self, resolution: Union[float, int]) -> List[FrozenSet]:
         raise NotImplementedError("This method should be overridden by subclasses")
 
 
 class GreedyModularity(CommunityMethod):
-    def find_communities(self, resolution: Union[float, int]) -> List[FrozenSet]:
+    randomized = False
+
+    def detect_communities(self, resolution: Union[float, int]) -> List[FrozenSet]:
         community_generator = nx.algorithms.community.greedy_modularity_communities(
             self.graph, weight=self.weight, resolution=resolution
         )
@@ -38,14 +64,102 @@ class GreedyModularity(CommunityMethod):
 
 
 class LouvainCommunities(CommunityMethod):
-    def find_communities(self, resolution: Union[float, int]) -> List[FrozenSet]:
+    # Default method: faster and lighter than greedy modularity on larger graphs; results depend on
+    # the random seed, so pass one for reproducible histories
+    def detect_communities(self, resolution: Union[float, int]) -> List[FrozenSet]:
         community_generator = nx.algorithms.community.louvain_communities(
             self.graph, weight=self.weight, resolution=resolution, seed=self.seed
         )
         return [frozenset(community) for community in community_generator]  # type: ignore
 
 
+class _IgraphCommunityMethod(CommunityMethod):
+    # Methods backed by the optional python-igraph package (and possibly others), which are only
+    # imported when one of these methods is requested. Modules are not kept on the instance, as
+    # they cannot be pickled and instances are sent to the worker processes of parallel sweeps.
+    name = ""
+    packages = ("igraph",)
+    pip_packages = "python-igraph"
+
+    def __init__(self, graph: nx.Graph, weight: str, seed: int = None):
+        super().__init__(graph, weight, seed)
+
+        try:
+            for package in self.packages:
+                importlib.import_module(package)
+        except ImportError as exc:
+            raise ImportError(
+                f"The '{self.name}' community method requires the following packages: "
+                f"{self.pip_packages} (pip install {self.pip_packages})"
+            ) from exc
+        igraph = self._module("igraph")
+
+        # Convert the graph once; nodes are added explicitly so that isolated languages are kept
+        self._names = list(graph.nodes())
+        node_index = {node: idx for idx, node in enumerate(self._names)}
+        edges = list(graph.edges(data=weight, default=1.0))
+        self._igraph = igraph.Graph(
+            n=len(self._names),
+            edges=[(node_index[u], node_index[v]) for u, v, _ in edges],
+        )
+        self._weights = [w for _, _, w in edges]
+
+    @staticmethod
+    def _module(package: str):
+        # Imported by `__init__()` in this process; worker processes import it on first use
+        return importlib.import_module(package)
+
+    def _to_communities(self, clusters) -> List[FrozenSet]:
+        return [frozenset(self._names[idx] for idx in cluster) for cluster in clusters]
+
+
+class LeidenCommunities(_IgraphCommunityMethod):
+    name = "leiden"
+    packages = ("igraph", "leidenalg")
+    pip_packages = "python-igraph leidenalg"
+
+    def detect_communities(self, resolution: Union[float, int]) -> List[FrozenSet]:
+        leidenalg = self._module("leidenalg")
+        partition = leidenalg.find_partition(
+            self._igraph,
+            leidenalg.RBConfigurationVertexPartition,
+            weights=self._weights,
+            resolution_parameter=resolution,
+            seed=self.seed,
+        )
+        return self._to_communities(partition)
+
+
+class IgraphLouvainCommunities(_IgraphCommunityMethod):
+    # The same algorithm as LouvainCommunities, run by igraph's C implementation
+    name = "louvain_fast"
+
+    def detect_communities(self, resolution: Union[float, int]) -> List[FrozenSet]:
+        igraph = self._module("igraph")
+
+        # igraph draws from the random number generator registered with it, for the whole process;
+        # a seeded generator is registered for this call only (making each resolution reproducible
+        # on its own, as with the other methods), and igraph's default one restored afterwards
+        if self.seed is None:
+            clustering = self._igraph.community_multilevel(
+                weights=self._weights, resolution=resolution
+            )
+        else:
+            igraph.set_random_number_generator(random.Random(self.seed))
+            try:
+                clustering = self._igraph.community_multilevel(
+                    weights=self._weights, resolution=resolution
+                )
+            finally:
+                igraph.set_random_number_generator(random)
+        return self._to_communities(clustering)
+
+
 class ParameterSearchStrategy:
+    # Whether `update()` needs the number of communities found at the current value; strategies
+    # that do not can have their whole schedule computed in advance (and evaluated in parallel)
+    depends_on_results = True
+
     def initialize(self) -> float:
         raise NotImplementedError
 
@@ -55,22 +169,37 @@ class ParameterSearchStrategy:
     def should_stop(self, num_communities: int, target: int) -> bool:
         raise NotImplementedError
 
+    def accept(self, parameter: float, num_communities: int) -> bool:
+        # Called when a value increases the number of communities; strategies that probe values
+        # out of order can decline it, so that only the values they settle on enter the history
+        return True
+
 
 class FixedIncrementStrategy(ParameterSearchStrategy):
+    depends_on_results = False
+
     def __init__(self, increment: float = 0.1):
         self.increment = increment
+        self.steps = 0
 
     def initialize(self) -> float:
+        self.steps = 0
         return 0.0
 
     def update(self, current_value: float, current_communities: int = None) -> float:
-        return current_value + self.increment
+        # Values are computed from the number of steps rather than accumulated, so that rounding
+        # errors do not build up along the sweep; the remaining error of the product is rounded
+        # away (e.g. 0.3 instead of 0.30000000000000004)
+        self.steps += 1
+        return round(self.steps * self.increment, 12)
 
     def should_stop(self, num_communities: int, target: int) -> bool:
         return num_communities == target
 
 
 class DynamicAdjustmentStrategy(ParameterSearchStrategy):
+    depends_on_results = False
+
     def __init__(self, initial_value: float = 0.0, adjust_factor: float = 0.1):
         self.adjust_factor = adjust_factor
         self.value = initial_value
@@ -144,76 +273,371 @@ class AdaptiveDynamicAdjustmentStrategy(ParameterSearchStrategy):
         return num_communities == target
 
 
+# Community detection method of a sweep worker process, set once by `_init_sweep_worker()` so that
+# the graph is not pickled again for every resolution
+_worker_community_method = None
+
+
+def _init_sweep_worker(community_method: CommunityMethod):
+    global _worker_community_method
+    _worker_community_method = community_method
+
+
+def _run_community_detection(resolution: float) -> Tuple[float, List[FrozenSet]]:
+    return resolution, _worker_community_method.find_communities(resolution=resolution)
+
+
+def _parallel_sweep(
+    community_method: CommunityMethod,
+    strategy: ParameterSearchStrategy,
+    num_probes: int,
+    workers: int,
+):
+    """
+    Yields the communities for the first values of a precomputable strategy schedule, in order.
+
+    Upcoming values are evaluated ahead of time in a pool of worker processes; probes still
+    pending when the consumer stops iterating are cancelled.
+
+    @param community_method: The community detection method to run.
+    @param strategy: The parameter search strategy; its `update()` must not depend on results.
+    @param num_probes: The maximum number of values to evaluate.
+    @param workers: The number of worker processes.
+    @return: A generator of `(parameter, communities)` tuples.
+    """
+    parameters = [strategy.initialize()]
+    while len(parameters) < num_probes:
+        parameters.append(strategy.update(parameters[-1]))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_sweep_worker,
+        initargs=(community_method,),
+    ) as executor:
+        pending = deque()
+        next_probe = 0
+        try:
+            for _ in range(num_probes):
+                # Keep a window of probes in flight ahead of the one being consumed
+                while next_probe < num_probes and len(pending) < 2 * workers:
+                    pending.append(
+                        executor.submit(_run_community_detection, parameters[next_probe])
+                    )
+                    next_probe += 1
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class BisectionStrategy(ParameterSearchStrategy):
+    """
+    Locates the values where the number of communities increases with a doubling search followed by
+    bisection, instead of probing every step of a fixed grid.
+
+    From the last accepted value, the step is doubled while the number of communities stays the
+    same; once it increases, the interval is bisected until it is no wider than `tolerance`, and
+    the upper end is accepted. Long plateaus are thus crossed with a logarithmic number of probes.
+    """
+
+    def __init__(self, initial_value: float = 0.0, step: float = 0.1, tolerance: float = None):
+        self.initial_value = initial_value
+        self.step = step
+        self.tolerance = step if tolerance is None else tolerance
+        self.stride = step
+        self.lower = None  # Highest value known not to increase the number of communities
+        self.upper = None  # Lowest value known to increase it
+        self.committed = None  # Number of communities at the last accepted value
+        self.accepted = False
+
+    def initialize(self) -> float:
+        return self.initial_value
+
+    def accept(self, parameter: float, num_communities: int) -> bool:
+        self.accepted = (
+            self.lower is None or parameter - self.lower <= self.tolerance + 1e-12
+        )
+        if self.accepted:
+            self.lower = parameter
+            self.upper = None
+            self.stride = self.step
+            self.committed = num_communities
+        return self.accepted
+
+    def update(self, current_value: float, current_communities: int) -> float:
+        if self.accepted:
+            # A new level was just recorded at `current_value` (now the lower end)
+            self.accepted = False
+        elif current_communities > self.committed:
+            self.upper = current_value
+        else:
+            self.lower = current_value
+            if self.upper is not None and current_value >= self.upper:
+                # The increase seen at `upper` did not reproduce, so resume the doubling search
+                self.upper = None
+            if self.upper is None:
+                self.stride *= 2
+
+        if self.upper is None:
+            return self.lower + self.stride
+        if self.upper - self.lower <= self.tolerance:
+            # Probe the upper end again, so that it is accepted and recorded
+            return self.upper
+        return (self.lower + self.upper) / 2
+
+    def should_stop(self, num_communities: int, target: int) -> bool:
+        return self.accepted and num_communities == target
+
+
+# Community detection methods available to build_history, by name
+COMMUNITY_METHODS = {
+    "greedy": GreedyModularity,
+    "louvain": LouvainCommunities,
+    "leiden": LeidenCommunities,
+    "louvain_fast": IgraphLouvainCommunities,
+}
+
+# Parameter search strategies available to build_history, by name; each factory receives the
+# target number of communities, the initial value and the adjustment factor
+SEARCH_STRATEGIES = {
+    "fixed": lambda target, initial_value, adjust_factor: FixedIncrementStrategy(),
+    "dynamic": lambda target, initial_value, adjust_factor: DynamicAdjustmentStrategy(
+        initial_value=initial_value, adjust_factor=adjust_factor
+    ),
+    "adaptive": lambda target, initial_value, adjust_factor: AdaptiveDynamicAdjustmentStrategy(
+        target=target, initial_value=initial_value, adjust_factor=adjust_factor
+    ),
+    "bisection": lambda target, initial_value, adjust_factor: BisectionStrategy(
+        initial_value=initial_value
+    ),
+}
+
+
+def build_hierarchical_history(
+    G: nx.Graph,
+    num_languages: int,
+    seed: int = None,
+    resolution: float = 1.0,
+) -> List[common.HistoryEntry]:
+    """
+    Builds a history from the levels of a single Louvain run instead of a resolution sweep.
+
+    Louvain aggregates communities level by level, so its successive partitions are nested. The
+    merges of each level are applied to a union-find structure over the languages, and every level
+    that merged something becomes a history entry, from the coarsest (closest to the root) to the
+    finest, followed by the individual languages. Entry parameters are level depths.
+
+    @param G: The language graph.
+    @param num_languages: The number of languages (nodes) in the graph.
+    @param seed: The random seed for Louvain.
+    @param resolution: The Louvain resolution used for all levels.
+    @return: The history, ordered from the root to the leaves.
+    """
+    levels = nx.algorithms.community.louvain_partitions(
+        G, weight="weight", resolution=resolution, seed=seed
+    )
+
+    # Walk the levels from the finest to the coarsest, recording the partition after each one
+    forest = common.UnionFind(G.nodes())
+    partitions = []
+    for level in levels:
+        merged = False
+        for community in level:
+            first, *others = community
+            for member in others:
+                merged |= forest.union(first, member)
+        if merged:
+            partitions.append(forest.groups())
+
+    history = []
+    for depth, communities in enumerate(reversed(partitions), start=1):
+        history.append(common.HistoryEntry(float(depth), communities))
+        print(f"Level: {depth}, Communities: {len(communities)}")
+
+    # Finish with the individual languages, so that every language becomes a leaf
+    if not history or history[-1].number_of_communities < num_languages:
+        history.append(
+            common.HistoryEntry(
+                float(len(history) + 1), [frozenset([node]) for node in G.nodes()]
+            )
+        )
+
+    return history
+
+
 def build_history(
     G: nx.Graph,
     num_languages: int,
-    method: str = "greedy",
+    method: str = "louvain",
     strategy_name: str = "fixed",
     initial_value: float = 0.0,
     adjust_factor: float = 0.1,
     seed: int = None,
+    workers: int = 1,
 ) -> List[common.HistoryEntry]:
 
-    # Obtain the community detection method based on the provided method string
-    community_method = {
-        "greedy": GreedyModularity(G, weight="weight", seed=seed),
-        "louvain": LouvainCommunities(G, weight="weight", seed=seed),
-    }.get(method)
-    if community_method is None:
+    # The hierarchical strategy reads all levels from a single Louvain run instead of sweeping
+    if strategy_name == "hierarchical":
+        if method != "louvain":
+            raise ValueError("The hierarchical strategy requires the louvain community method")
+        return build_hierarchical_history(G, num_languages, seed=seed)
+
+    # Obtain the community detection method based on the provided method string (classes are
+    # only instantiated once selected, as some depend on optional packages)
+    community_class = COMMUNITY_METHODS.get(method)
+    if community_class is None:
         raise ValueError("Unsupported community detection method")
 
-    # Obtain the search strategy based on the provided strategy string
-    strategy = {
-        "fixed": FixedIncrementStrategy(),
-        "dynamic": DynamicAdjustmentStrategy(
-            initial_value=initial_value, adjust_factor=adjust_factor
-        ),
-        "adaptive": AdaptiveDynamicAdjustmentStrategy(
-            target=num_languages,
-            initial_value=initial_value,
-            adjust_factor=adjust_factor,
-        ),
-    }.get(strategy_name)
-    if strategy is None:
+    # Communities are detected and decomposed over integer node ids, which are cheaper to hash and
+    # compare than language names; names are only restored for the recorded history entries. The
+    # relabelled graph keeps the original node order, so seeded results are unchanged.
+    node_names = list(G.nodes())
+    G = nx.convert_node_labels_to_integers(G)
+    community_method = community_class(G, weight="weight", seed=seed)
+
+    # Obtain the search strategy based on the provided strategy string, building only that one
+    strategy_factory = SEARCH_STRATEGIES.get(strategy_name)
+    if strategy_factory is None:
         raise ValueError("Unsupported parameter search strategy")
+    strategy = strategy_factory(num_languages, initial_value, adjust_factor)
 
     history = []
+    last_communities = None  # Communities of the last history entry, as node ids
+    last_partition = None  # Partition detected in the previous iteration, as a fingerprint
     parameter = strategy.initialize()
     max_iterations = 200  # Increased for complex datasets like Indo-European
     iteration_count = 0
 
-    while iteration_count < max_iterations:
-        identified_communities = community_method.find_communities(resolution=parameter)
-
-        # After obtaining the communities, we must make sure that the new communities do not contradict the
-        # previous ones, as the algorithm might group at this level taxa that were separated in the
-        # previous one (this is a common issue in some hierarchical clustering algorithms).
-        if not history:
-            # First level
-            communities = identified_communities
-        else:
-            communities = common.decompose_sets(
-                history[-1].communities, identified_communities
-            )
-
-        num_communities = len(communities)
+    # Strategies with a fixed schedule can have upcoming resolutions evaluated in parallel; the
+    # adaptive one needs each result before choosing the next value, so it always runs serially.
+    # A non-positive number of workers means one per CPU.
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    probes = None
+    if workers > 1 and not strategy.depends_on_results:
+        probes = _parallel_sweep(community_method, strategy, max_iterations, workers)
+    elif workers > 1:
+        logging.info(
+            f"Strategy '{strategy_name}' depends on previous results; running the sweep serially."
+        )
 
-        # Store the history entry if the number of communities has increased (depending on the algorithm and the parameters,
-        # the number of communities may decrease in some iterations))
-        if not history or num_communities > history[-1].number_of_communities:
-            history_entry = common.HistoryEntry(parameter, communities)
-            history.append(history_entry)
-            print(f"Parameter: {parameter:.4f}, Communities: {num_communities}")
+    # The worker pool of a parallel sweep is shut down even if the search fails
+    try:
+        while iteration_count < max_iterations:
+            if probes is None:
+                identified_communities = community_method.find_communities(resolution=parameter)
+            else:
+                parameter, identified_communities = next(probes)
+
+            # After obtaining the communities, we must make sure that the new communities do not contradict the
+            # previous ones, as the algorithm might group at this level taxa that were separated in the
+            # previous one (this is a common issue in some hierarchical clustering algorithms).
+            partition = frozenset(identified_communities)
+            if partition == last_partition:
+                # Same partition as in the previous iteration (a plateau of the sweep): decomposing it
+                # against the same, or the just recorded, last communities gives the same result
+                pass
+            elif last_communities is None:
+                # First level
+                communities = identified_communities
+            else:
+                communities = common.decompose_sets(last_communities, identified_communities)
+            last_partition = partition
+
+            num_communities = len(communities)
+
+            # Store the history entry if the number of communities has increased (depending on the algorithm and the parameters,
+            # the number of communities may decrease in some iterations)), and the strategy accepts the value
+            increased = not history or num_communities > history[-1].number_of_communities
+            if increased and strategy.accept(parameter, num_communities):
+                history_entry = common.HistoryEntry(
+                    parameter,
+                    [frozenset(node_names[node] for node in community) for community in communities],
+                )
+                history.append(history_entry)
+                last_communities = communities
+                print(f"Parameter: {parameter:.4f}, Communities: {num_communities}")
 
-        if strategy.should_stop(num_communities, num_languages):
-            break
+            if strategy.should_stop(num_communities, num_languages):
+                break
 
-        parameter = strategy.update(parameter, num_communities)
-        iteration_count += 1
+            if probes is None:
+                parameter = strategy.update(parameter, num_communities)
+            iteration_count += 1
+    finally:
+        if probes is not None:
+            probes.close()
 
     if iteration_count >= max_iterations:
         print(f"Warning: Reached maximum iterations ({max_iterations}). Stopping search.")
-    
+
+    # If the search ended before separating every language, finish with the individual languages
+    # so that each of them still becomes a leaf of the tree. The last value probed may not be
+    # past the last recorded one (adaptive and parallel searches), so the entry is placed one
+    # average step after it, keeping the branches to the leaves of a comparable length.
+    if history and history[-1].number_of_communities < num_languages:
+        logging.warning(
+            f"The search reached {history[-1].number_of_communities} communities for "
+            f"{num_languages} languages; the remaining languages are split in a final level."
+        )
+        last_parameter = history[-1].parameter
+        if parameter <= last_parameter:
+            span = last_parameter - history[0].parameter
+            step = span / (len(history) - 1) if span > 0 else 1.0
+            parameter = last_parameter + step
+        history.append(
+            common.HistoryEntry(parameter, [frozenset([name]) for name in node_names])
+        )
+
+    return history
+
+
+def get_history(
+    G: nx.Graph,
+    num_languages: int,
+    cache_dir: str = None,
+    **kwargs,
+) -> List[common.HistoryEntry]:
+    """
+    Returns the history of a graph, reusing a copy cached on disk if available.
+
+    Only seeded runs are cached, as unseeded ones are not reproducible. The cache key combines
+    the graph (nodes, edges and weights, in order) with the search options and a digest of the
+    GRAPE sources, so histories are rebuilt after the search code changes; the number of
+    workers does not change the result and is left out.
+
+    @param G: The graph to search for communities.
+    @param num_languages: The target number of communities.
+    @param cache_dir: The directory holding cached histories. If None, caching is disabled.
+    @param kwargs: The search options, as in `build_history()`.
+    @return: The list of history entries.
+    """
+    if cache_dir is None or kwargs.get("seed") is None:
+        return build_history(G, num_languages, **kwargs)
+
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(common.source_digest(__file__, common.__file__).encode("utf-8"))
+    hasher.update(repr(list(G.nodes())).encode("utf-8"))
+    for edge in G.edges(data="weight"):
+        hasher.update(repr(edge).encode("utf-8"))
+    options = {key: value for key, value in kwargs.items() if key != "workers"}
+    hasher.update(repr((num_languages, sorted(options.items()))).encode("utf-8"))
+    cache_file = os.path.join(cache_dir, f"history_{hasher.hexdigest()}.pickle")
+
+    if os.path.exists(cache_file):
+        logging.info(f"Loading cached history from '{cache_file}'.")
+        with open(cache_file, "rb") as f_in:
+            return pickle.load(f_in)
+
+    history = build_history(G, num_languages, **kwargs)
+
+    # Write to a temporary file first, so concurrent runs never read a partial history
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as f_out:
+        pickle.dump(history, f_out)
+    os.replace(tmp_file, cache_file)
+
     return history
 
 
@@ -325,21 +749,22 @@ def remove_single_descendant_nodes(tree: TreeNode) -> TreeNode:
         stack = [node]
         while stack:
             current_node = stack.pop()
-            # Iterate over children list while modifying it (use a copy)
-            for child_node in current_node.get_children():
-                stack.append(child_node)
 
-            # If the node has exactly one child and it's not the root
-            if len(current_node.children) == 1 and current_node.up is not None:
-                child = current_node.children[0]
-                # Update the child's distance from its new parent (the grandparent)
-                child.dist += current_node.dist
+            # Rebuild the children list in a single pass, replacing each chain of unary
+            # nodes by its last node (the first with zero or several children)
+            new_children = []
+            for child in current_node.children:
+                while len(child.children) == 1:
+                    grandchild = child.children[0]
+                    # The grandchild's distance now runs from the unary node's parent
+                    grandchild.dist += child.dist
+                    child = grandchild
 
-                # Connect the child directly to the grandparent
-                current_node.up.add_child(child, dist=child.dist)
+                child.up = current_node
+                new_children.append(child)
 
-                # Remove the current node (which also removes it from its parent's children list)
-                current_node.up.remove_child(current_node)
+            current_node.children[:] = new_children
+            stack.extend(new_children)
 
     # Start processing from the root
     current_root_node = tree
@@ -355,6 +780,72 @@ def remove_single_descendant_nodes(tree: TreeNode) -> TreeNode:
     return current_root_node
 
 
+class _CladeNode:
+    """Minimal tree node used while assembling a phylogeny, before conversion to ete3."""
+
+    __slots__ = ("name", "resolution", "dist", "children")
+
+    def __init__(self, name: str = "", resolution: float = 0.0, dist: float = 0.0):
+        self.name = name
+        self.resolution = resolution
+        self.dist = dist
+        self.children: List["_CladeNode"] = []
+
+
+def _to_ete_tree(root: _CladeNode) -> TreeNode:
+    """
+    Converts a tree of lightweight clade nodes into an ete3 tree in a single pass.
+
+    Children are attached directly to the ete3 child lists, bypassing the per-call
+    overhead of `TreeNode.add_child()`.
+
+    @param root: The root of the lightweight tree.
+    @return: The root of the equivalent ete3 tree.
+    """
+    tree_root = Tree()
+    stack = [(root, tree_root)]
+    while stack:
+        node, ete_node = stack.pop()
+        for child in node.children:
+            ete_child = TreeNode(name=child.name, dist=child.dist)
+            ete_child.up = ete_node
+            ete_node.children.append(ete_child)
+            stack.append((child, ete_child))
+
+    return tree_root
+
+
+def _clade_label(clade: FrozenSet[str]) -> str:
+    """Returns a deterministic, human-readable label for a clade (used in error messages)."""
+    return "/".join(sorted(clade))
+
+
+def _order_descendants(root: TreeNode) -> None:
+    """
+    Clears the names of internal nodes and orders all children in a single postorder pass.
+
+    Children end up in the same order as with `sort_descendants()` followed by
+    `ladderize()`: by increasing number of leaves, ties broken by their sorted leaf names.
+
+    @param root: The root of the tree, modified in place.
+    """
+    # Sorted leaf names of the subtrees already visited, dropped once their parent is sorted
+    leaf_names: Dict[int, List[str]] = {}
+    stack = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if not node.children:
+            leaf_names[id(node)] = [node.name]
+        elif not children_done:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.children)
+        else:
+            node.name = ""
+            names = {id(child): leaf_names.pop(id(child)) for child in node.children}
+            node.children.sort(key=lambda child: (len(names[id(child)]), str(names[id(child)])))
+            leaf_names[id(node)] = sorted(name for child_names in names.values() for name in child_names)
+
+
 def build_tree_from_history(history: List[common.HistoryEntry]) -> TreeNode:
     """
     Constructs a phylogenetic tree from a provided historical sequence of taxonomic groupings.
@@ -379,24 +870,21 @@ def build_tree_from_history(history: List[common.HistoryEntry]) -> TreeNode:
     if not history:
         return TreeNode()
 
-    # Initialize the root TreeNode.
-    tree_root = Tree()
-    node_resolutions: Dict[TreeNode, float] = {tree_root: 0.0}
+    # Initialize the root node. The tree is assembled with lightweight nodes and only
+    # converted to ete3 once its structure is complete.
+    tree_root = _CladeNode(resolution=0.0)
 
-    last_observed_ancestor: Dict[str, TreeNode] = {}
+    last_observed_ancestor: Dict[str, _CladeNode] = {}
 
-    # Extract all unique taxa from the most granular level of the history.
-    if history[-1].communities:
-        taxa = sorted(
-            list(set(taxon for clade in history[-1].communities for taxon in clade))
-        )
-    else:
-        taxa = []  # Should not happen with valid history leading to taxa
+    # Extract all unique taxa from the most granular level of the history (none only if it is invalid).
+    taxa = sorted({taxon for clade in history[-1].communities for taxon in clade})
 
     for taxon in taxa:
         last_observed_ancestor[taxon] = tree_root
 
-    observed_clades: List[FrozenSet[str]] = []
+    # Clades are frozensets, so they are used directly as keys (their hash is cached). Only
+    # internal clades are stored; a taxon already has its leaf if it is its own last ancestor.
+    observed_clades: Dict[FrozenSet[str], _CladeNode] = {}
 
     # Iterate through the entire history to build the tree structure.
     for entry in history:  # Process all entries, including history[0]
@@ -406,69 +894,150 @@ def build_tree_from_history(history: List[common.HistoryEntry]) -> TreeNode:
         for clade_members in clades_in_entry:
             if not clade_members:  # Skip empty clades if they occur
                 continue
-            if clade_members in observed_clades:
-                continue
 
-            clade_label = "/".join(sorted(list(clade_members)))
-            new_node = TreeNode(name=clade_label)
-            node_resolutions[new_node] = current_entry_resolution
+            # Only leaves keep their names in the final tree, so internal clades are left unnamed
+            is_singleton = len(clade_members) == 1
+            if is_singleton:
+                node_name = next(iter(clade_members))
+                ancestor = last_observed_ancestor.get(node_name)
+                if ancestor is not None:
+                    if ancestor.name == node_name:
+                        continue
+
+                    # Fast path for leaves: a single taxon has a single ancestor, which is its parent
+                    new_node = _CladeNode(node_name, current_entry_resolution)
+                    new_node.dist = max(1e-8, current_entry_resolution - ancestor.resolution)
+                    ancestor.children.append(new_node)
+                    last_observed_ancestor[node_name] = new_node
+                    continue
+            else:
+                if clade_members in observed_clades:
+                    continue
+                node_name = ""
+            new_node = _CladeNode(node_name, current_entry_resolution)
 
             # Determine the parent node for this new_node.
-            # All members of the clade_members set should share the same last_observed_ancestor.
-            potential_parents = {
-                last_observed_ancestor[member]
-                for member in clade_members
-                if member in last_observed_ancestor
-            }
-
-            actual_parent_node: TreeNode
-            if not potential_parents:
-                # This implies taxa in clade_members were not in last_observed_ancestor map.
-                # This could happen if history is malformed or taxa are introduced mid-history without prior record.
-                # Defaulting to tree_root or raising error are options.
-                # For now, we assume valid history means this path is less likely for non-root clades.
-                # If current_entry_resolution is the first one, parent is tree_root.
-                if current_entry_resolution == history[0].parameter:
-                    actual_parent_node = tree_root
-                else:
-                    # This is an unexpected state for a non-root clade.
+            # All members of the clade_members set should share the same last_observed_ancestor, so
+            # the common case is confirmed with identity checks that stop at the first mismatch; the
+            # full set of ancestors is only collected otherwise.
+            members = iter(clade_members)
+            actual_parent_node = last_observed_ancestor.get(next(members))
+            if actual_parent_node is None or any(
+                last_observed_ancestor.get(member) is not actual_parent_node
+                for member in members
+            ):
+                potential_parents = {
+                    last_observed_ancestor[member]
+                    for member in clade_members
+                    if member in last_observed_ancestor
+                }
+
+                if not potential_parents:
+                    # This implies taxa in clade_members were not in last_observed_ancestor map.
+                    # This could happen if history is malformed or taxa are introduced mid-history without prior record.
+                    # Defaulting to tree_root or raising error are options.
+                    # For now, we assume valid history means this path is less likely for non-root clades.
+                    # If current_entry_resolution is the first one, parent is tree_root.
+                    if current_entry_resolution == history[0].parameter:
+                        actual_parent_node = tree_root
+                    else:
+                        # This is an unexpected state for a non-root clade.
+                        raise ValueError(
+                            f"Clade '{_clade_label(clade_members)}' at resolution {current_entry_resolution} has no identifiable parent. Taxa: {clade_members}"
+                        )
+                elif len(potential_parents) > 1:
+                    # Labels are only needed for the error message, so they are rebuilt here
+                    clade_of_node = {id(node): clade for clade, node in observed_clades.items()}
+                    parent_names = sorted(
+                        _clade_label(clade_of_node.get(id(p), frozenset([p.name])))
+                        for p in potential_parents
+                    )
                     raise ValueError(
-                        f"Clade '{clade_label}' at resolution {current_entry_resolution} has no identifiable parent. Taxa: {clade_members}"
+                        f"Clade '{_clade_label(clade_members)}' at resolution {current_entry_resolution} has multiple potential parents: "
+                        f"{parent_names} ({len(potential_parents)}). This indicates inconsistent history."
                     )
-            elif len(potential_parents) > 1:
-                parent_names = sorted([p.name for p in potential_parents])
-                raise ValueError(
-                    f"Clade '{clade_label}' at resolution {current_entry_resolution} has multiple potential parents: "
-                    f"{parent_names} ({len(potential_parents)}). This indicates inconsistent history."
-                )
-            else:
-                actual_parent_node = potential_parents.pop()
+                else:
+                    actual_parent_node = potential_parents.pop()
 
-            # Add the new node as a child of its parent. Default to 0 if parent not in map (e.g. root)
-            parent_resolution = node_resolutions.get(actual_parent_node, 0.0)
-            branch_length = max(1e-8, node_resolutions[new_node] - parent_resolution)
-            actual_parent_node.add_child(new_node, dist=branch_length)
+            # Add the new node as a child of its parent (the root has a resolution of 0)
+            new_node.dist = max(1e-8, new_node.resolution - actual_parent_node.resolution)
+            actual_parent_node.children.append(new_node)
 
-            observed_clades.append(clade_members)
+            if not is_singleton:
+                observed_clades[clade_members] = new_node
 
-            # Update last_observed_ancestor for all members of this new clade.
-            for member in clade_members:
-                last_observed_ancestor[member] = new_node
+            # Update last_observed_ancestor for all members of this new clade in a single merge.
+            last_observed_ancestor.update(dict.fromkeys(clade_members, new_node))
 
     # Post-processing: Prune unary nodes.
-    final_tree_root = remove_single_descendant_nodes(tree_root)
-
-    # Clean up internal node names and temporary features.
-    for node in final_tree_root.traverse("postorder"):  # type: ignore
-        if not node.is_leaf():
-            node.name = ""
+    final_tree_root = remove_single_descendant_nodes(_to_ete_tree(tree_root))
 
-    final_tree_root.sort_descendants()
-    final_tree_root.ladderize()
+    # Clean up internal node names and order the children.
+    _order_descendants(final_tree_root)
 
     return final_tree_root
 
 
+def _shared_cognateset_counts(
+    rows: Sequence[int], columns: Sequence[int]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Counts the cognatesets shared by each pair of languages from (language, cognateset) entries.
+
+    The entries form an indicator matrix of the languages involved by cognatesets, whose product
+    with its transpose gives the number of cognatesets shared by every pair of languages at once.
+
+    @param rows: The language index of each entry.
+    @param columns: The cognateset identifier of each entry.
+    @return: The language indices of each pair (first < second) sharing at least one cognateset,
+             and the number of cognatesets they share.
+    """
+    if not len(rows):
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty, empty
+
+    # Only the languages and cognatesets present are given rows and columns
+    languages, local_rows = np.unique(rows, return_inverse=True)
+    _, local_cols = np.unique(columns, return_inverse=True)
+    indicator = np.zeros((len(languages), local_cols.max() + 1))
+    indicator[local_rows, local_cols] = 1.0
+    shared_counts = indicator @ indicator.T
+
+    # `languages` is sorted, so pairs in the local upper triangle keep their order in the global one
+    local1, local2 = np.nonzero(np.triu(shared_counts, k=1))
+    return (
+        languages[local1],
+        languages[local2],
+        shared_counts[local1, local2].astype(np.intp),
+    )
+
+
+def _graph_from_weight_matrix(
+    nodes: List[str], labels: List[str], weights: np.ndarray
+) -> nx.Graph:
+    """
+    Builds a weighted graph from an upper-triangular matrix of edge weights.
+
+    @param nodes: The languages to add as nodes, including those without edges.
+    @param labels: The language of each row/column of `weights`.
+    @param weights: A matrix whose positive entries above the diagonal are the edge weights.
+    @return: A graph with an edge for each positive entry of `weights`.
+    """
+    idx1, idx2 = np.nonzero(weights > 0)
+
+    G = nx.Graph()
+    G.add_nodes_from(nodes)
+    G.add_weighted_edges_from(
+        zip(
+            [labels[i] for i in idx1.tolist()],
+            [labels[j] for j in idx2.tolist()],
+            weights[idx1, idx2].tolist(),
+        )
+    )
+
+    return G
+
+
 def cognateset_graph(data: Dict[Tuple[str, str], Set[int]]) -> nx.Graph:
     """
     Builds a graph of languages with weighted edges based on shared cognate sets.
@@ -482,55 +1051,25 @@ def cognateset_graph(data: Dict[Tuple[str, str], Set[int]]) -> nx.Graph:
              between languages.
     """
 
-    # Extract languages and concepts from keys
-    languages = set()
-    concepts = set()
-    for lang, concept in data.keys():
-        languages.add(lang)
-        concepts.add(concept)
-
-    # Prepare to count cognatesets shared between language pairs for each concept
-    concept_lang_cognatesets = defaultdict(lambda: defaultdict(set))
-
-    # Fill the structure with available data
+    # Index the languages (in order of appearance) and collect the entries of an indicator matrix of
+    # languages by (concept, cognateset) columns, in a single pass over the data
+    language_index = {}
+    column_index = {}
+    rows, cols = [], []
     for (lang, concept), cognatesets in data.items():
-        concept_lang_cognatesets[concept][lang] = cognatesets
-
-    # Create a structure to hold weights of edges between languages
-    language_pairs = defaultdict(int)
-
-    # Calculate weights for edges by checking shared cognatesets
-    for concept in concepts:
-        # Get languages for this concept
-        concept_languages = concept_lang_cognatesets[concept]
-
-        # Compare each pair of languages
-        lang_list = list(concept_languages.keys())
-        for i in range(len(lang_list)):
-            for j in range(i + 1, len(lang_list)):
-                lang1 = lang_list[i]
-                lang2 = lang_list[j]
-                # Find intersection of cognatesets and increment weight for the pair
-                shared_cognatesets = concept_lang_cognatesets[concept][
-                    lang1
-                ].intersection(concept_lang_cognatesets[concept][lang2])
-                if shared_cognatesets:
-                    language_pairs[(lang1, lang2)] += len(shared_cognatesets)
-                    language_pairs[(lang2, lang1)] += len(shared_cognatesets)
-
-    # Create the graph
-    G = nx.Graph()
-
-    # Add nodes
-    for language in languages:
-        G.add_node(language)
+        row = language_index.setdefault(lang, len(language_index))
+        for cognateset in cognatesets:
+            rows.append(row)
+            cols.append(column_index.setdefault((concept, cognateset), len(column_index)))
+    languages = list(language_index)
 
-    # Add weighted edges based on shared cognatesets
-    for (lang1, lang2), weight in language_pairs.items():
-        if weight > 0:
-            G.add_edge(lang1, lang2, weight=weight)
+    # Each shared cognateset contributes 1 to the weight of an edge
+    weights = np.zeros((len(languages), len(languages)), dtype=np.int64)
+    idx1, idx2, shared_counts = _shared_cognateset_counts(rows, cols)
+    weights[idx1, idx2] = shared_counts
 
-    return G
+    # Create the graph, with an edge for each pair sharing at least one cognateset
+    return _graph_from_weight_matrix(sorted(languages), languages, weights)
 
 
 def adjusted_cognateset_graph(
@@ -567,46 +1106,38 @@ def adjusted_cognateset_graph(
     """
     language_index = {lang: idx for idx, lang in enumerate(sorted_languages)}
 
+    # Collect the languages, the largest number of cognatesets of a language for a concept, and
+    # the (language index, cognateset) entries of each concept in a single pass over the data,
+    # leaving out of the entries languages that are not in the distance matrix
     languages = set()
-    concepts = set()
-    for lang, concept in data.keys():
-        languages.add(lang)
-        concepts.add(concept)
-
-    concept_lang_cognatesets = defaultdict(lambda: defaultdict(set))
+    max_shared = 0
+    concept_entries = defaultdict(list)
     for (lang, concept), cognatesets in data.items():
-        concept_lang_cognatesets[concept][lang] = cognatesets
-
-    language_pairs = defaultdict(float)
-
-    # Calculate weights for edges by checking shared cognatesets
-    for concept, langs in concept_lang_cognatesets.items():
-        lang_list = list(langs.keys())
-        num_langs = len(lang_list)
-        for i in range(num_langs):
-            for j in range(i + 1, num_langs):
-                lang1, lang2 = lang_list[i], lang_list[j]
-                if lang1 in language_index and lang2 in language_index:
-                    shared_cognatesets = langs[lang1].intersection(langs[lang2])
-                    if shared_cognatesets:
-                        idx1, idx2 = language_index[lang1], language_index[lang2]
-                        proximity_correction = 1 / (
-                            distance_matrix[idx1, idx2] ** proximity_weight
-                        )
-                        sharing_correction = len(shared_cognatesets) ** sharing_factor
-                        weight_adjustment = proximity_correction * sharing_correction
-                        language_pairs[(lang1, lang2)] += weight_adjustment
-                        language_pairs[(lang2, lang1)] += weight_adjustment
-
-    # Create the graph
-    G = nx.Graph()
-    for language in languages:
-        G.add_node(language)
-    for (lang1, lang2), weight in language_pairs.items():
-        if weight > 0:
-            G.add_edge(lang1, lang2, weight=weight)
+        languages.add(lang)
+        max_shared = max(max_shared, len(cognatesets))
+        idx = language_index.get(lang)
+        if idx is not None:
+            concept_entries[concept].extend((idx, cognateset) for cognateset in cognatesets)
+
+    # The proximity correction of every pair of languages; a zero distance (identical languages)
+    # yields an infinite correction, and so an infinite weight if the pair shares any cognateset
+    with np.errstate(divide="ignore"):
+        proximity_correction = 1.0 / (distance_matrix**proximity_weight)
+
+    # Shared counts are small integers (at most `max_shared`), so their sharing corrections are
+    # looked up instead of raised to a power each time
+    sharing_corrections = np.arange(max_shared + 1, dtype=float) ** sharing_factor
+
+    # Accumulate the weights in the upper triangle of a dense matrix, one concept at a time
+    weights = np.zeros((len(sorted_languages), len(sorted_languages)))
+    for entries in concept_entries.values():
+        rows, cognatesets = zip(*entries)
+        idx1, idx2, shared_counts = _shared_cognateset_counts(rows, cognatesets)
+        weights[idx1, idx2] += (
+            proximity_correction[idx1, idx2] * sharing_corrections[shared_counts]
+        )
 
-    return G
+    return _graph_from_weight_matrix(sorted(languages), sorted_languages, weights)
 
 
 def apply_outgroup_weighting(graph: nx.Graph, outgroup_languages: List[str], weight_factor: float) -> nx.Graph:
@@ -665,7 +1196,13 @@ def build_graph(method: str, **kwargs) -> nx.Graph:
     return graph
 
 
-def main(args):
+def load_graph(args) -> nx.Graph:
+    """
+    Reads the cognate data and builds the graph of languages, as selected by the arguments.
+
+    @param args: The parsed arguments, as returned by `parse_arguments()`.
+    @return: The graph, with one node per language.
+    """
     # Read the cognate data from a file
     cognates = common.read_cognate_file(
         args["source"],
@@ -676,10 +1213,8 @@ def main(args):
         args["cognateset_column"],
     )
 
-    # Obtain a sorted list of languages and concepts, and then their counts
-    languages = sorted({lang for lang, _ in cognates.keys()})
-    concepts = sorted({concept for _, concept in cognates.keys()})
-    num_languages = len(languages)
+    # Obtain a sorted list of languages and concepts
+    languages, concepts = common.extract_languages_and_concepts(cognates)
 
     # Build the graph
     G = None
@@ -691,9 +1226,20 @@ def main(args):
             outgroup_weight_factor=args["outgroup_weight_factor"]
         )
     elif args["graph"] == "adjusted":
-        # Compute the distance matrix
-        distance_matrix = common.compute_distance_matrix(
-            cognates, synonyms=args["synonyms"], missing_data=args["missing_data"]
+        # Compute the distance matrix (or load it from the cache, if enabled)
+        distance_matrix = common.get_distance_matrix(
+            cognates,
+            args["source"],
+            cache_dir=args["cache_dir"],
+            synonyms=args["synonyms"],
+            missing_data=args["missing_data"],
+            read_options=(
+                args["dialect"],
+                args["encoding"],
+                args["language_column"],
+                args["concept_column"],
+                args["cognateset_column"],
+            ),
         )
 
         G = build_graph(
@@ -713,14 +1259,35 @@ def main(args):
     # nx.write_gexf(G, "graph.gexf")
     logging.info("Graph built successfully.")
 
-    family_history = build_history(
+    return G
+
+
+def main(args, G: nx.Graph = None) -> TreeNode:
+    """
+    Runs the GRAPE pipeline, from the cognate data to the tree.
+
+    @param args: The parsed arguments, as returned by `parse_arguments()`.
+    @param G: A graph already built with `load_graph()` for the same arguments, if available;
+              it is not modified, so it can be shared between runs with different search options.
+    @return: The tree (also logged in Newick format).
+    """
+    if G is None:
+        G = load_graph(args)
+
+    # Every language is a node of the graph, and the search aims at separating all of them
+    num_languages = G.number_of_nodes()
+
+    # Search for the history (or load it from the cache, for seeded runs, if enabled)
+    family_history = get_history(
         G,
         num_languages,
+        cache_dir=args["cache_dir"],
         method=args["community"],
         strategy_name=args["strategy"],
         initial_value=args["initial_value"],
         adjust_factor=args["adjust_factor"],
         seed=args["seed"],
+        workers=args["workers"],
     )
 
     phylogeny = build_tree_from_history(family_history)
@@ -736,8 +1303,16 @@ def main(args):
     newick_tree = phylogeny.write(format=1)
     logging.info(f"Newick format tree: {newick_tree}")
 
+    return phylogeny
 
-if __name__ == "__main__":
+
+def parse_arguments(argv: Sequence[str] = None) -> Dict:
+    """
+    Parses the command line arguments.
+
+    @param argv: The arguments to parse; if None, the arguments of the command line are used.
+    @return: A dictionary of the parsed arguments, as expected by `main()`.
+    """
     parser = argparse.ArgumentParser(
         description="Perform phylogenetic reconstruction using GRAPE."
     )
@@ -786,14 +1361,15 @@ if __name__ == "__main__":
     parser.add_argument(
         "--community",
         default="louvain",
-        choices=["greedy", "louvain"],
-        help="Method to detect communities",
+        choices=list(COMMUNITY_METHODS),
+        help="Method to detect communities ('louvain_fast' requires the python-igraph package, "
+        "'leiden' also requires leidenalg)",
     )
     parser.add_argument(
         "--strategy",
         default="fixed",
-        choices=["fixed", "dynamic", "adaptive"],
-        help="Strategy to use",
+        choices=[*SEARCH_STRATEGIES, "hierarchical"],
+        help="Strategy to use ('hierarchical' uses the levels of a single Louvain run)",
     )
     parser.add_argument(
         "--synonyms",
@@ -812,7 +1388,7 @@ if __name__ == "__main__":
         "--initial_value",
         type=float,
         default=0.0,
-        help="Initial value if strategy is dynamic or adaptive",
+        help="Initial value if strategy is dynamic, adaptive or bisection",
     )
     parser.add_argument(
         "--adjust_factor",
@@ -856,9 +1432,30 @@ if __name__ == "__main__":
         action="store_true",
         help="Force outgroup languages to root level by post-processing the tree",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes for evaluating resolutions in parallel, or 0 for one per "
+        "CPU; only used with the fixed and dynamic strategies (default: 1)",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        default=None,
+        help="Directory for caching intermediate results (distance matrices, seeded histories) "
+        "across runs (default: caching disabled)",
+    )
 
     # Parse arguments
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+
+    # The hierarchical strategy does not sweep resolutions, so a starting value would be ignored
+    if args.strategy == "hierarchical" and args.initial_value != parser.get_default("initial_value"):
+        parser.error("--initial_value is not used by the hierarchical strategy")
+
+    return vars(args)
 
+
+if __name__ == "__main__":
     # Pass the parsed arguments to the main function
-    main(vars(args))
+    main(parse_arguments())
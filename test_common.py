@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+import unittest
+import os
+import tempfile
+import numpy as np
+
+import common
+
+
+# Test data files
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+HARALD_IE_FILE = os.path.join(DATA_DIR, 'harald_ie.tsv')
+
+
+class TestUnionFind(unittest.TestCase):
+    """Tests for the disjoint-set forest used to build hierarchical histories."""
+
+    def test_initial_singletons(self):
+        """Test that every element starts in its own set."""
+        forest = common.UnionFind(['A', 'B', 'C'])
+
+        for element in ['A', 'B', 'C']:
+            self.assertEqual(forest.find(element), element)
+        self.assertEqual(forest.groups(), [frozenset(['A']), frozenset(['B']), frozenset(['C'])])
+
+    def test_union_and_find(self):
+        """Test that unions merge sets (reporting whether they were separate) and find their representatives."""
+        forest = common.UnionFind(['A', 'B', 'C', 'D', 'E'])
+
+        self.assertTrue(forest.union('A', 'B'))
+        self.assertTrue(forest.union('C', 'D'))
+        self.assertTrue(forest.union('B', 'D'))
+        self.assertFalse(forest.union('A', 'C'), "Elements already in the same set were merged again")
+
+        self.assertEqual(len({forest.find(element) for element in ['A', 'B', 'C', 'D']}), 1)
+        self.assertNotEqual(forest.find('E'), forest.find('A'))
+
+    def test_groups(self):
+        """Test that groups are listed by the first appearance of their elements."""
+        forest = common.UnionFind(['A', 'B', 'C', 'D', 'E'])
+        forest.union('E', 'B')
+        forest.union('D', 'A')
+
+        self.assertEqual(
+            forest.groups(),
+            [frozenset(['A', 'D']), frozenset(['B', 'E']), frozenset(['C'])],
+        )
+
+
+class TestDistanceMatrixCache(unittest.TestCase):
+    """Tests for the distance matrices cached on disk across runs."""
+
+    def test_cache_round_trip(self):
+        """Test that a cached matrix is read back by a second call, unchanged."""
+        read_options = ('auto', 'utf-8', 'Language', 'Concept', 'Cognateset')
+        cognates = common.read_cognate_file(HARALD_IE_FILE, *read_options)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            first_matrix = common.get_distance_matrix(
+                cognates, HARALD_IE_FILE, cache_dir=cache_dir, read_options=read_options
+            )
+            self.assertEqual(len([name for name in os.listdir(cache_dir) if name.endswith('.npy')]), 1)
+
+            with self.assertLogs(level='INFO') as logs:
+                second_matrix = common.get_distance_matrix(
+                    cognates, HARALD_IE_FILE, cache_dir=cache_dir, read_options=read_options
+                )
+
+        self.assertTrue(any('Loading cached distance matrix' in line for line in logs.output),
+                        "The second call did not read the cached matrix")
+        np.testing.assert_array_equal(second_matrix, first_matrix)
+        np.testing.assert_array_equal(first_matrix, common.compute_distance_matrix(cognates))
+
+
+if __name__ == '__main__':
+    unittest.main()
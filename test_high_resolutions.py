@@ -5,6 +5,23 @@ sys.path.append('.')
 from grape import *
 from common import read_cognate_file
 import networkx as nx
+from concurrent.futures import ProcessPoolExecutor
+
+# Graph shared by the worker processes, set once per worker
+_worker_graph = None
+
+def _init_worker(G):
+    global _worker_graph
+    _worker_graph = G
+
+def _detect_communities(resolution):
+    communities = nx.community.louvain_communities(_worker_graph, resolution=resolution, seed=42)
+    return [frozenset(community) for community in communities]
+
+def louvain_partitions(G, resolutions):
+    """Compute the seeded Louvain partition of the graph for each resolution, in parallel"""
+    with ProcessPoolExecutor(initializer=_init_worker, initargs=(G,)) as executor:
+        return dict(zip(resolutions, executor.map(_detect_communities, resolutions)))
 
 def test_high_resolutions():
     """Test much higher resolution parameters"""
@@ -22,12 +39,13 @@ def test_high_resolutions():
     # Test much higher resolution parameters
     resolutions_to_test = [1.0, 2.0, 5.0, 10.0, 15.0, 20.0, 25.0, 30.0]
     
+    # Apply Louvain community detection for all resolutions at once
+    partitions = louvain_partitions(G, resolutions_to_test)
+    
     for resolution in resolutions_to_test:
         print(f"\n=== Resolution: {resolution} ===")
         
-        # Apply Louvain community detection
-        communities_dict = nx.community.louvain_communities(G, resolution=resolution, seed=42)
-        communities_list = [frozenset(community) for community in communities_dict]
+        communities_list = partitions[resolution]
         
         print(f"Number of communities: {len(communities_list)}")
         
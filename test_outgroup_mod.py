@@ -1,22 +1,68 @@
 #!/usr/bin/env python3
 
-from ete3 import Tree
+import functools
 import os
+import re
+from typing import List, Optional
+
+# A leaf name follows an opening parenthesis or a comma; internal labels follow a closing one
+LEAF_NAME_RE = re.compile(r'(?:^|[(,])\s*([^(),:;\s]+)')
+
+@functools.lru_cache(maxsize=None)
+def read_newick(path: str) -> Optional[str]:
+    """Read the Newick tree of a saved file or GRAPE log (read once per file), or None if it has none."""
+    with open(path, 'r') as f:
+        text = f.read()
+    
+    for line in text.splitlines():
+        if 'Newick format tree:' in line:
+            return line.split('Newick format tree: ')[1].strip()
+    
+    text = text.strip()
+    return text if text.endswith(';') else None
+
+def top_level_branches(newick: str) -> List[str]:
+    """Split a Newick string into the Newick strings of its root children, without building a tree."""
+    text = newick.strip().rstrip(';')
+    if not text.startswith('('):
+        return []
+    
+    # Drop the outer parentheses and any root label or branch length
+    text = text[1:text.rindex(')')]
+    
+    branches = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(text):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            branches.append(text[start:i].strip())
+            start = i + 1
+    branches.append(text[start:].strip())
+    
+    return branches
+
+def leaf_names(newick: str) -> List[str]:
+    """Get the leaf names of a Newick string, in order."""
+    return LEAF_NAME_RE.findall(newick)
 
 def test_outgroup_modification():
     """Test if the outgroup modification worked"""
     
     if os.path.exists('test_hittite_outgroup.newick'):
-        tree = Tree(open('test_hittite_outgroup.newick').read().strip())
+        newick = read_newick('test_hittite_outgroup.newick')
         print('TESTING HITTITE OUTGROUP MODIFICATION:')
         print('='*40)
         
-        root_children = tree.children
+        root_children = top_level_branches(newick)
         print(f'Root has {len(root_children)} main branches')
         
         if len(root_children) == 2:
-            branch1_langs = root_children[0].get_leaf_names()
-            branch2_langs = root_children[1].get_leaf_names()
+            branch1_langs = leaf_names(root_children[0])
+            branch2_langs = leaf_names(root_children[1])
             
             if branch1_langs == ['Hittite']:
                 print('✓ SUCCESS! Hittite is alone in first branch')
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 import os
-from ete3 import Tree
+from test_outgroup_mod import read_newick, top_level_branches, leaf_names
 
 def test_sequential_outgroups():
     """Test the sequential outgroup approach"""
@@ -13,12 +13,7 @@ def test_sequential_outgroups():
         return False
         
     # Extract Newick tree
-    newick_line = None
-    with open(tree_file, 'r') as f:
-        for line in f:
-            if 'Newick format tree:' in line:
-                newick_line = line.split('Newick format tree: ')[1].strip()
-                break
+    newick_line = read_newick(tree_file)
     
     if not newick_line:
         print("No Newick tree found in file")
@@ -28,41 +23,42 @@ def test_sequential_outgroups():
     with open('test_sequential.newick', 'w') as f:
         f.write(newick_line)
     
-    tree = Tree(newick_line)
-    
     print('SEQUENTIAL OUTGROUP STRUCTURE TEST:')
     print('='*45)
     
     def analyze_structure(node, depth=0):
         indent = '  ' * depth
-        if node.is_leaf():
-            print(f'{indent}→ {node.name}')
-            return [node.name]
+        children = top_level_branches(node)
+        if not children:
+            name = leaf_names(node)[0]
+            print(f'{indent}→ {name}')
+            return [name]
         else:
-            print(f'{indent}├─ Internal node ({len(node.children)} children)')
+            print(f'{indent}├─ Internal node ({len(children)} children)')
             all_leaves = []
-            for i, child in enumerate(node.children):
+            for i, child in enumerate(children):
                 child_leaves = analyze_structure(child, depth+1)
                 all_leaves.extend(child_leaves)
             return all_leaves
     
-    all_languages = analyze_structure(tree)
+    all_languages = analyze_structure(newick_line)
     
     print(f'\nTotal languages: {len(all_languages)}')
     
     # Check if we have the ideal structure
-    root_children = tree.children
+    root_children = top_level_branches(newick_line)
     if len(root_children) == 2:
-        branch1 = root_children[0].get_leaf_names()
-        branch2 = root_children[1].get_leaf_names()
+        branch1 = leaf_names(root_children[0])
+        branch2 = leaf_names(root_children[1])
         
         if branch1 == ['Hittite']:
             print('\n✓ SUCCESS: Hittite is the first outgroup!')
             
             # Check if second branch has Tocharian as second outgroup
-            if len(root_children[1].children) == 2:
-                sub1 = root_children[1].children[0].get_leaf_names()  
-                sub2 = root_children[1].children[1].get_leaf_names()
+            sub_branches = top_level_branches(root_children[1])
+            if len(sub_branches) == 2:
+                sub1 = leaf_names(sub_branches[0])
+                sub2 = leaf_names(sub_branches[1])
                 
                 toch_expected = {'Tocharian_A', 'Tocharian_B'}
                 if set(sub1) == toch_expected:
@@ -78,7 +74,7 @@ def test_sequential_outgroups():
                     print(f'  Sub-branch 1: {len(sub1)} languages')
                     print(f'  Sub-branch 2: {len(sub2)} languages')
             else:
-                print(f'✗ Second branch has {len(root_children[1].children)} sub-branches (expected 2)')
+                print(f'✗ Second branch has {len(sub_branches)} sub-branches (expected 2)')
         else:
             print('✗ Hittite not isolated as first outgroup')
     else:
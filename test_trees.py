@@ -1,18 +1,33 @@
 #!/usr/bin/env python3
 
-from ete3 import Tree
 import sys
+from enum import IntEnum
+from test_outgroup_mod import read_newick, top_level_branches, leaf_names
+
+class Score(IntEnum):
+    """How well a tree places the outgroups, comparable for ranking"""
+    ERROR = 0
+    POOR = 1
+    GOOD = 2
+    PERFECT = 3
+
+SCORE_LABELS = {
+    Score.PERFECT: "PERFECT ★★★",
+    Score.GOOD: "GOOD ★★☆",
+    Score.POOR: "POOR ★☆☆",
+    Score.ERROR: "ERROR",
+}
 
 def analyze_tree_structure(tree_file, description):
     """Analyze if a tree has correct Hittite/Tocharian positioning"""
     
     try:
-        tree = Tree(open(tree_file).read().strip())
+        newick = read_newick(tree_file)
         
         print(f"=== {description} ===")
         
         # Check root structure
-        root_children = tree.children
+        root_children = top_level_branches(newick)
         print(f"Root has {len(root_children)} main branches")
         
         # Look for the ideal structure: Hittite alone vs rest
@@ -20,8 +35,8 @@ def analyze_tree_structure(tree_file, description):
         tocharian_second = False
         
         if len(root_children) == 2:
-            branch1_langs = root_children[0].get_leaf_names()
-            branch2_langs = root_children[1].get_leaf_names()
+            branch1_langs = leaf_names(root_children[0])
+            branch2_langs = leaf_names(root_children[1])
             
             # Check if one branch has only Hittite
             if branch1_langs == ['Hittite']:
@@ -41,9 +56,10 @@ def analyze_tree_structure(tree_file, description):
             # If Hittite is correctly positioned, check Tocharian in the rest
             if hittite_alone and other_branch:
                 # Check if the other branch splits Tocharian early
-                if len(other_branch.children) == 2:
-                    sub_branch1 = other_branch.children[0].get_leaf_names()
-                    sub_branch2 = other_branch.children[1].get_leaf_names()
+                sub_branches = top_level_branches(other_branch)
+                if len(sub_branches) == 2:
+                    sub_branch1 = leaf_names(sub_branches[0])
+                    sub_branch2 = leaf_names(sub_branches[1])
                     
                     toch_in_1 = any('Tocharian' in lang for lang in sub_branch1)
                     toch_in_2 = any('Tocharian' in lang for lang in sub_branch2)
@@ -61,20 +77,20 @@ def analyze_tree_structure(tree_file, description):
         
         # Score this tree
         if hittite_alone and tocharian_second:
-            score = "PERFECT ★★★"
+            score = Score.PERFECT
         elif hittite_alone:
-            score = "GOOD ★★☆"
+            score = Score.GOOD
         else:
-            score = "POOR ★☆☆"
+            score = Score.POOR
             
-        print(f"Score: {score}")
+        print(f"Score: {SCORE_LABELS[score]}")
         print()
         return score
         
     except Exception as e:
         print(f"ERROR analyzing {tree_file}: {e}")
         print()
-        return "ERROR"
+        return Score.ERROR
 
 def main():
     """Test all generated trees"""
@@ -94,7 +110,7 @@ def main():
     print("SUMMARY RANKING:")
     print("-" * 50)
     for tree_file, description, score in results:
-        print(f"{score:<12} {description}")
+        print(f"{SCORE_LABELS[score]:<12} {description}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file